@@ -1,9 +1,42 @@
-from google.colab import auth, output
-import gspread
-from oauth2client.client import GoogleCredentials
-from google.auth import default
+def Credentials():
+  """
+  Gets the Google credentials.
+  Uses the Colab login when running in Colab, otherwise the application default credentials
+  """
+  from google.auth import default
+
+  try:
+    from google.colab import auth
+    auth.authenticate_user()
+  except ImportError:
+    pass  # Not in Colab, default() finds the credentials on its own
+  creds, _ = default(scopes=['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive'])
+  return creds
+
 
 def Authenticate():
-  auth.authenticate_user()
-  creds, _ = default()
-  gc = gspread.authorize(creds)
+  """
+  Authenticates with Google and returns a GSpread client.
+  Uses the Colab login when running in Colab, otherwise the application default credentials
+  """
+  import gspread
+
+  gc = gspread.authorize(Credentials())
+  return gc
+
+
+def TokenSource(creds):
+  """
+  Wraps google-auth credentials as a token source for googler.CredentialManager.
+  The returned function refreshes the credentials and returns the access token and its expiry as a time.time() timestamp
+  """
+  def fetch_token():
+    import time
+    from datetime import timezone
+    from google.auth.transport.requests import Request
+
+    creds.refresh(Request())
+    if creds.expiry is None:
+      return creds.token, time.time() + 3600  # Google tokens live an hour
+    return creds.token, creds.expiry.replace(tzinfo=timezone.utc).timestamp()  # expiry is a naive UTC datetime
+  return fetch_token
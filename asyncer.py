@@ -1,8 +1,157 @@
 import asyncio
-import nest_asyncio
+import contextlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable, Union, Optional, Tuple
 
 
+class TaskTiming:
+    """
+    Object holding the timestamps of a single task, in time.perf_counter seconds
+    Attributes:
+        index: the index of the task in the coroutines list
+        submitted: when the task was handed to the executor
+        started: when the executor started calling the callable, None while queued
+        finished: when the callable returned, None while running
+    Methods:
+        queue_wait: the time spent waiting for a free executor worker
+        run_time: the time spent in the callable
+    """
+    __slots__ = ('index', 'submitted', 'started', 'finished')
+
+    def __init__(self, index: int, submitted: float):
+        """
+        Initializer method
+        Arguments:
+            index: the index of the task in the coroutines list
+            submitted: when the task was handed to the executor
+        """
+        self.index = index
+        self.submitted = submitted
+        self.started = None
+        self.finished = None
+
+    def queue_wait(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Method for getting the time the task waited for a free executor worker
+        Arguments:
+            now: time.perf_counter timestamp to measure a task that has not started yet against, optional
+        Returns:
+            float: seconds between submit and start, or between submit and now if the task has not started.
+                   None if the task has not started and now is not given
+        """
+        if self.started is None:
+            return None if now is None else now - self.submitted
+        return self.started - self.submitted
+
+    def run_time(self) -> Optional[float]:
+        """
+        Method for getting the time spent in the callable
+        Returns:
+            float: seconds between start and finish, None if the task has not finished
+        """
+        return None if self.finished is None else self.finished - self.started
+
+
+class RunMetrics:
+    """
+    Object holding the aggregate metrics of an Async.run batch, either after the run or as a live snapshot during it
+    Attributes:
+        tasks: the number of tasks submitted
+        started: the number of tasks the executor has started
+        queued: the number of tasks still waiting for a free executor worker
+        finished: the number of tasks that have finished
+        in_flight: the number of tasks running in the executor at the time of the metrics
+        peak_in_flight: the highest number of tasks running in the executor at the same time
+        workers: the number of executor workers
+        elapsed: seconds from the first submit to the last finish, or to now for a live snapshot
+        queue_wait: dictionary of queue wait percentiles in seconds, key'd by the percentile. Tasks still queued count with their wait so far
+        run_time: dictionary of run time percentiles in seconds, key'd by the percentile
+        utilization: the fraction of the available worker time spent running tasks
+        saturation: the fraction of the elapsed time where every worker was busy, so new tasks had to queue
+        throughput: finished tasks per second
+        sort_time: seconds spent putting together the output after the tasks finished, None for live snapshots
+    """
+    percentiles = (50, 90, 99, 100)
+
+    def __init__(self, timings: Iterable[TaskTiming], workers: int, sort_time: Optional[float] = None):
+        """
+        Initializer method
+        Arguments:
+            timings: the timings of the tasks in the batch
+            workers: the number of executor workers
+            sort_time: seconds spent putting together the output, optional
+        """
+        timings = list(timings)
+        now = time.perf_counter()
+        starts = [t.started for t in timings if t.started is not None]
+        finishes = [t.finished for t in timings if t.finished is not None]
+
+        self.tasks = len(timings)
+        self.started = len(starts)
+        self.queued = self.tasks - self.started
+        self.finished = len(finishes)
+        self.in_flight = self.started - self.finished
+        self.workers = workers
+        self.sort_time = sort_time
+
+        begin = min([t.submitted for t in timings], default=now)
+        end = max(finishes) if timings and self.finished == self.tasks else now
+        self.elapsed = end - begin
+
+        self.queue_wait = self.__percentiles([t.queue_wait(end) for t in timings])
+        self.run_time = self.__percentiles([t.run_time() for t in timings if t.finished is not None])
+
+        events = sorted([(x, 1) for x in starts] + [(x, -1) for x in finishes])  # Finishes sort before starts at the same time
+        in_flight, peak, busy, saturated, previous = 0, 0, 0., 0., begin
+        for timestamp, change in events:
+            busy += in_flight * (timestamp - previous)
+            saturated += (timestamp - previous) if in_flight >= workers else 0.
+            in_flight += change
+            peak = max(peak, in_flight)
+            previous = timestamp
+        busy += in_flight * (end - previous)  # Tasks still running count until now
+        saturated += (end - previous) if in_flight >= workers else 0.
+
+        self.peak_in_flight = peak
+        self.utilization = busy / (workers * self.elapsed) if self.elapsed > 0 else 0.
+        self.saturation = saturated / self.elapsed if self.elapsed > 0 else 0.
+        self.throughput = self.finished / self.elapsed if self.elapsed > 0 else 0.
+
+    def __percentiles(self, values: list) -> dict:
+        """
+        Private method for getting the percentiles of a list of values, interpolating linearly between the closest ranks
+        Arguments:
+            values: list of floats
+        Returns:
+            dict: the percentiles key'd by the percentile, None for each if values is empty
+        """
+        values = sorted(values)
+        output = {}
+        for percentile in self.percentiles:
+            if not values:
+                output[percentile] = None
+                continue
+            rank = (len(values) - 1) * percentile / 100
+            low = int(rank)
+            high = min(low + 1, len(values) - 1)
+            output[percentile] = values[low] + (values[high] - values[low]) * (rank - low)
+        return output
+
+    def __str__(self) -> str:
+        def milliseconds(percentiles: dict) -> str:
+            return ' '.join('p{}={}'.format(p, 'NaN' if v is None else '{:.1f}ms'.format(v * 1000)) for p, v in percentiles.items())
+
+        message = ('{finished}/{tasks} tasks in {elapsed:.2f}s ({throughput:.1f} tasks/s), queued {queued}, in flight {in_flight} (peak {peak_in_flight}/{workers} workers), '
+                   'utilization {utilization:.0%}, saturation {saturation:.0%}\n'
+                   'queue wait: {waits}\n'
+                   'run time: {runs}').format(waits=milliseconds(self.queue_wait), runs=milliseconds(self.run_time), **vars(self))
+        if self.sort_time is not None:
+            message += '\nsort time: {:.1f}ms'.format(self.sort_time * 1000)
+        return message
+
+
 class Async:
     """
     Object to de-sync anything
@@ -11,11 +160,17 @@ class Async:
         loop: the asyncio event loop
         coroutines: a list of the coroutines to be run
         output: a dictionary of the functions inputted, key'd by the index it was run by
+        executor: the ThreadPoolExecutor the callables are run in, None for the event loop's default executor
+        workers: the number of executor workers
+        timings: a dictionary of TaskTiming objects of the last run, key'd by the index it was run by
+        metrics: RunMetrics object of the last run, None before the first run
     Methods:
         append_coroutines: a method for calling the private async method __append_coroutines to put coroutines into the coroutines list
         run: a method for running the coroutines in the event loop, blocking until complete, returns the output attribute
         number_of_coroutines: method for getting the length of the coroutine list
         clear_coroutines: method for clearing coroutines from the list
+        close: method for shutting down the executor created for the workers argument
+        snapshot: method for getting the live RunMetrics of the current run
     Example:
         import numpy as np
 
@@ -38,16 +193,28 @@ class Async:
         > {0: 0.8414709848078965, 1: 0.9092974268256817, 5: -0.4161468365471424,
            2: 0.1411200080598672, 6: -0.9899924966004454, 3: -0.26237485370392877,
            7: 0.9649660284921133, 4: 0.5403023058681398, 4: None}}
+
+        # Inspect where the time went
+        print(example.metrics)
+        > 9/9 tasks in 10.00s (0.9 tasks/s), queued 0, in flight 0 (peak 2/5 workers), utilization 20%, saturation 0%
+          queue wait: p50=0.1ms p90=0.2ms p99=0.3ms p100=0.3ms
+          run time: p50=0.0ms p90=2000.1ms p99=9200.1ms p100=10000.1ms
+          sort time: 0.0ms
     """
 
-    def __init__(self, error: Union[asyncio.TimeoutError, Exception] = asyncio.TimeoutError, timeout: Union[float, int, None] = None, semaphore: int = 100):
+    def __init__(self, error: Union[asyncio.TimeoutError, Exception] = asyncio.TimeoutError, timeout: Union[float, int, None] = None, semaphore: int = 100,
+                 workers: Optional[int] = None, snapshot_interval: Union[float, int, None] = None, snapshot_callback: callable = print):
         """
         Async initializer function
         Arguments:
             error: The exception to raise on a timeout
             timeout: Float describing how many seconds to run the tasks before timeout
             semaphore: integer to set the semaphore limiter by
+            workers: integer, the number of executor workers. Uses the event loop's default executor if not given
+            snapshot_interval: Float describing how many seconds between live metrics snapshots during a run. No snapshots if not given
+            snapshot_callback: callable taking the RunMetrics snapshot. Default = print
         """
+        _apply_nest_asyncio()                           # Allow event loop nesting, on first use rather than at import
         self.semaphore = asyncio.Semaphore(semaphore)   # Set semaphore limit
         self.loop = asyncio.get_event_loop()            # Access asyncio event loop
         self.coroutines = []                            # Initialize variables
@@ -56,6 +223,13 @@ class Async:
         self.error = error
         self.timeout = timeout
 
+        self.executor = None if workers is None else ThreadPoolExecutor(max_workers=workers)
+        self.workers = min(32, (os.cpu_count() or 1) + 4) if workers is None else workers  # Size of the default executor if not given
+        self.timings = {}
+        self.metrics = None
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_callback = snapshot_callback
+
     def append_coroutines(self, f: callable, args: Iterable[tuple]):
         """
         Synchronous entry point for adding routines to the asyncio event loop
@@ -74,15 +248,30 @@ class Async:
             dict or list: key is the index if the coroutine in the coroutine list, value is the coroutine output.
                           If sort=True then out is a sorted list
         """
-        self.output = {}                             # Clear the output before running
-        self.loop.run_until_complete(self.__main())  # Run main function until complete
+        self.output = {}                                 # Clear the output and timings before running
+        self.timings = {}
+        try:
+            self.loop.run_until_complete(self.__main())  # Run main function until complete
+        finally:
+            self.metrics = RunMetrics(self.timings.values(), self.workers)  # Keep the metrics on timeouts as well
 
         self.clear_coroutines()
 
+        t = time.perf_counter()
         if sort:
-            return [self.output[key] for key in sorted(self.output.keys())]     # Output sorted list if sort
+            output = [self.output[key] for key in sorted(self.output.keys())]   # Output sorted list if sort
         else:
-            return self.output                                                  # Otherwise output indexed dict
+            output = self.output                                                # Otherwise output indexed dict
+        self.metrics.sort_time = time.perf_counter() - t
+        return output
+
+    def snapshot(self) -> RunMetrics:
+        """
+        Method for getting the metrics of the current run while it is running
+        Returns:
+            RunMetrics object with the tasks submitted so far
+        """
+        return RunMetrics(list(self.timings.values()), self.workers)
 
     def number_of_coroutines(self) -> int:
         """
@@ -92,6 +281,20 @@ class Async:
         """
         return len(self.coroutines)
 
+    def close(self):
+        """
+        Method for shutting down the executor created for the workers argument. The default executor is left to the event loop
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def __enter__(self) -> 'Async':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def clear_coroutines(self, indexes: Optional[Tuple[int]] = None):
         """
         Method for clearing the coroutines from the list. Optional, if not given then it clears the entire list
@@ -130,7 +333,25 @@ class Async:
         """
         Asynchronous private intermediary method to allow catching TimeoutErrors
         """
-        await asyncio.wait(self.coroutines)
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in self.coroutines]  # Newer Pythons only accept tasks
+        if self.snapshot_interval is None:
+            await asyncio.wait(tasks)
+            return
+        monitor = asyncio.ensure_future(self.__snapshots())
+        try:
+            await asyncio.wait(tasks)
+        finally:
+            monitor.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await monitor  # Don't leave the cancelled monitor pending on the shared loop
+
+    async def __snapshots(self):
+        """
+        Asynchronous private method for handing live metrics to the snapshot callback every snapshot interval
+        """
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            self.snapshot_callback(self.snapshot())
 
     async def __de_sync(self, f: callable, args: tuple, n: int):
         """
@@ -140,13 +361,40 @@ class Async:
             args: tuple, the arguments the run the function with
             n: int, address of the function output in output
         """
+        self.timings[n] = TaskTiming(n, time.perf_counter())
         try:
-            self.output[n] = (await self.loop.run_in_executor(None, f, *args))
+            self.output[n] = (await self.loop.run_in_executor(self.executor, self.__timed, self.timings[n], f, args))
         except asyncio.TimeoutError:
             raise self.error  # Raise exception on timeout
 
+    @staticmethod
+    def __timed(timing: TaskTiming, f: callable, args: tuple):
+        """
+        Private method run in the executor, calling the function and recording when it started and finished
+        Arguments:
+            timing: TaskTiming, the timing object of the task
+            f: callable, the function to call
+            args: tuple, the arguments the run the function with
+        """
+        timing.started = time.perf_counter()
+        try:
+            return f(*args)
+        finally:
+            timing.finished = time.perf_counter()
 
-nest_asyncio.apply()   # Allow asyncio event loop nesting
+
+def _apply_nest_asyncio():
+    """
+    Patches asyncio to allow event loop nesting. Only patches once, the first time an Async object is created
+    """
+    global _nested
+    if not _nested:
+        import nest_asyncio
+        nest_asyncio.apply()
+        _nested = True
+
+
+_nested = False
 
 if __name__ == '__main__':
     example = Async()
@@ -197,6 +445,16 @@ if __name__ == '__main__':
         example.append_coroutines(np.sin, [(1,), (2,), (3,), (50,)])
         print(example.run(sort=True))
 
+    def test_metrics():
+        import time
+
+        print('Testing metrics with 4 workers and 12 tasks of 0.2s, expecting 3 waves and full saturation')
+        with Async(workers=4, snapshot_interval=0.25) as metered:
+            metered.append_coroutines(time.sleep, [(0.2,) for _ in range(12)])
+            metered.run()
+        print('Final metrics:')
+        print(metered.metrics)
+
     def test_effect():
         import requests
         from PersonalPackages import kingtimer
@@ -210,9 +468,9 @@ if __name__ == '__main__':
             return output
 
         def test2(url: str, n: int):
-            ac = Async()
-            ac.append_coroutines(requests.get, [(url,) for _ in range(n)])
-            return ac.run(sort=True)
+            with Async() as ac:
+                ac.append_coroutines(requests.get, [(url,) for _ in range(n)])
+                return ac.run(sort=True)
 
         print('Runtime for test 1:')
         _ = kingtimer.runtime(test1, (URL, N))[0]
@@ -227,4 +485,6 @@ if __name__ == '__main__':
     print()
     test_run_sorted()
     print()
+    test_metrics()
+    print()
     test_effect()
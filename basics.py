@@ -8,35 +8,25 @@ Original file is located at
 """
 
 #imports
-import requests
-from json import dumps
-import pandas as pd
-import datetime
-from google.colab import output
-import gspread
-from google.colab import auth, output
-from oauth2client.client import GoogleCredentials
-from google.auth import default
-from datetime import datetime 
-from requests.auth import HTTPBasicAuth
-import json
-from dateutil.relativedelta import relativedelta
-import time
-import re
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from compacter import compact_dataframe
 
 class Basics:
-    def __init__(self, sheet_id, sheet, startrow):
-        auth.authenticate_user()
-        self.creds, _ = default()
-        self.gc = gspread.authorize(self.creds)
+    def __init__(self, sheet_id, sheet, startrow, gc=None):
+        if gc is None:
+            import google_auth
+            gc = google_auth.Authenticate()  # Only log in when no client is shared with us
+        self.gc = gc
         self.sheet_id = sheet_id
         self.connection = self.gc.open_by_url("https://docs.google.com/spreadsheets/d/"+str(self.sheet_id))
         self.sheet = self.connection.worksheet(sheet)
         self.startrow = startrow
 
-    def data_from_sheet(self):
+    def data_from_sheet(self, compact=False):
+        from gspread_dataframe import get_as_dataframe
+
         dataframe = get_as_dataframe(self.sheet)
         dataframe.columns = dataframe.iloc[self.startrow, :].tolist()
         dataframe = dataframe.drop(range(self.startrow+1))
+        if compact:
+            dataframe = compact_dataframe(dataframe)  # Categoricals and nullable integers instead of objects
         return dataframe
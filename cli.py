@@ -0,0 +1,59 @@
+import argparse
+from typing import Optional, Sequence
+
+
+def keyword_difficulty(args: argparse.Namespace):
+    """
+    Runs the keyword difficulty job, filling in the Keyword difficulty column of the Keyword Analysis sheet
+    Arguments:
+        args: the parsed command line arguments
+    """
+    import google_auth
+    from googler import CredentialManager
+    from keyword_difficulty import KeywordDiffiulty
+
+    with CredentialManager(google_auth.TokenSource(google_auth.Credentials())) as manager:  # Keeps the token valid in the background for the whole job
+        KeywordDiffiulty(args.sheet_id, manager.authorize()).postdata()
+
+
+def content_map(args: argparse.Namespace):
+    """
+    Runs the content map job, moving the Content Gap keywords into the Keyword Analysis and rebuilding the Content map
+    Arguments:
+        args: the parsed command line arguments
+    """
+    import google_auth
+    from googler import CredentialManager
+    from update_content_map import UpdateScript
+
+    with CredentialManager(google_auth.TokenSource(google_auth.Credentials())) as manager:  # Keeps the token valid in the background for the whole job
+        UpdateScript(args.sheet_id, manager.authorize(), args.compact).update_googlesheet()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Command line entry point for the sheet jobs
+    Arguments:
+        argv: the command line arguments, optional. Defaults to sys.argv
+    Example:
+        python cli.py keyword-difficulty 1gkH1gS7Vj0x70PVKMJZhzVLuuMoa3dl2RqzVNmAp3u8
+        python cli.py content-map 18ItgOhKo5FoZCjXmsaUtpHphjQHhNMHGCBGdEpK-Bdk --compact
+    """
+    parser = argparse.ArgumentParser(description='SEO department sheet jobs')
+    jobs = parser.add_subparsers(dest='job', required=True)
+
+    job = jobs.add_parser('keyword-difficulty', help='fill in keyword difficulty from DataForSEO')
+    job.add_argument('sheet_id', help='id of the Google sheets document')
+    job.set_defaults(run=keyword_difficulty)
+
+    job = jobs.add_parser('content-map', help='update the Keyword Analysis and Content map sheets')
+    job.add_argument('sheet_id', help='id of the Google sheets document')
+    job.add_argument('--compact', action='store_true', help='load the sheets with categoricals and nullable integers')
+    job.set_defaults(run=content_map)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+from typing import Iterable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def memory_usage(data: pd.DataFrame) -> int:
+    """
+    Convenience function for getting the deep memory usage of a DataFrame
+    Arguments:
+        data: the pandas DataFrame to measure
+    Returns:
+        int: the number of bytes used by the DataFrame, including the contents of object columns
+    """
+    return int(data.memory_usage(deep=True).sum())
+
+
+def memory_report(*data: pd.DataFrame) -> str:
+    """
+    Convenience function for summarizing the memory saved by compact_dataframe
+    Arguments:
+        data: the compacted pandas DataFrames
+    Returns:
+        string with the total memory usage before and after compacting
+    """
+    before = sum(x.attrs['memory_usage'][0] for x in data)
+    after = sum(x.attrs['memory_usage'][1] for x in data)
+    return 'Memory usage: {:.2f} MB -> {:.2f} MB'.format(before / 1024 ** 2, after / 1024 ** 2)
+
+
+def compact_dataframe(data: pd.DataFrame, category_ratio: float = 0.5, exclude: Optional[Iterable[str]] = None,
+                      verbose: bool = False) -> pd.DataFrame:
+    """
+    Function for converting a DataFrame loaded from a sheet to memory compact types.
+    Numeric columns are downcast to the smallest nullable integer type, or float if they have decimals.
+    Repeated string columns are converted to categoricals.
+    The memory usage before and after is kept in attrs['memory_usage'] as a tuple of bytes
+    Arguments:
+        data: the pandas DataFrame to compact
+        category_ratio: float, string columns with fewer unique values than this ratio of the rows become categoricals
+        exclude: column names to leave untouched, optional
+        verbose: boolean, prints the memory usage before and after if True
+    Returns:
+        A compacted copy of the DataFrame
+    """
+    import pandas as pd
+
+    exclude = set(exclude or ())
+    before = memory_usage(data)
+    data = data.copy()
+
+    for n, name in enumerate(data.columns):
+        if name in exclude:
+            continue
+        column = data.iloc[:, n]
+        if not (pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column)):
+            continue  # Only loosely typed columns are compacted
+
+        column = column.replace('', None)  # Empty sheet cells are missing values
+        values = column.dropna()
+        if values.empty:
+            continue
+
+        numbers = pd.to_numeric(values, errors='coerce')
+        if not numbers.isna().any() and not values.map(lambda x: isinstance(x, bool)).any():
+            data.isetitem(n, _downcast(pd.to_numeric(column, errors='coerce')))
+        elif values.map(lambda x: isinstance(x, str)).all() and values.nunique() <= category_ratio * len(column):
+            data.isetitem(n, column.astype('category'))
+
+    data.attrs['memory_usage'] = (before, memory_usage(data))
+    if verbose:
+        print(memory_report(data))
+    return data
+
+
+def _downcast(column: pd.Series) -> pd.Series:
+    """
+    Private function for downcasting a numeric column to the smallest fitting nullable type
+    Arguments:
+        column: the numeric pandas Series to downcast
+    Returns:
+        The Series as the smallest nullable integer type if every value is whole, otherwise as a nullable float
+    """
+    import numpy as np
+
+    values = column.dropna()
+    if not (values % 1 == 0).all():
+        return column.astype('Float64')
+    for dtype in ('Int32', 'Int64'):  # Int32 at the least, so sums over groups of rows don't overflow
+        limits = np.iinfo(dtype.lower())
+        if values.empty or (limits.min <= values.min() and values.max() <= limits.max):
+            return column.astype(dtype)
+    return column.astype('Float64')
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    def test_dtypes():
+        print('Testing compacted dtypes')
+        data = pd.DataFrame({'Volume': ['10', '20', '', 40],
+                             'Traffic': ['1.5', '2', '3', None],
+                             'Mapped URL': ['https://x.dk/a', 'https://x.dk/a', 'https://x.dk/b', 'https://x.dk/a'],
+                             'Useable': [True, False, True, True]}, dtype=object)
+        compact = compact_dataframe(data)
+        print('Expected: Volume Int32, Traffic Float64, Mapped URL category, Useable object')
+        print('Measured:', ', '.join('{} {}'.format(name, dtype) for name, dtype in compact.dtypes.items()))
+
+    def test_memory():
+        print('Testing memory drop on 100000 sheet rows')
+        data = pd.DataFrame({'Volume': [str(n % 5000) for n in range(100000)],
+                             'Position': [str(n % 100) + '.0' for n in range(100000)],
+                             'Priority': [('High', 'Medium', 'Low')[n % 3] for n in range(100000)]}, dtype=object)
+        compact = compact_dataframe(data, verbose=True)
+        print('Memory usage dropped:', memory_usage(compact) < memory_usage(data))
+
+    test_dtypes()
+    print()
+    test_memory()
@@ -1,6 +1,12 @@
-from google.colab import auth
-import gspread
-from oauth2client.client import GoogleCredentials
+from __future__ import annotations
+import threading
+import time
+from datetime import timezone
+from typing import Callable, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import gspread
+    from managed_credentials import ManagedCredentials
 
 
 class Auth:
@@ -12,10 +18,18 @@ class Auth:
     Methods:
         authenticate: Method for getting an authenticated client via GSpread
         re_authenticate: Method to re-authenticate the client if timeout has occurred
+        fetch_token: Method for getting a fresh access token and its expiry
+        manage: Method for getting a started CredentialManager keeping the client's token valid
     """
     def __init__(self):
         """Initializer method"""
-        auth.authenticate_user()
+        from oauth2client.client import GoogleCredentials
+
+        try:
+            from google.colab import auth
+            auth.authenticate_user()  # Log in through Colab when available
+        except ImportError:
+            pass  # Otherwise rely on the application default credentials
         self.credentials = GoogleCredentials.get_application_default()
         self.client = None
 
@@ -25,6 +39,8 @@ class Auth:
         Returns:
             GSpread client object with the Google credentials
         """
+        import gspread
+
         self.client = gspread.authorize(self.credentials)
         return self.client
 
@@ -34,3 +50,291 @@ class Auth:
         """
         if self.credentials.access_token_expired:
             self.client.login()  # refreshes the token
+
+    def fetch_token(self) -> Tuple[str, float]:
+        """
+        Method for getting a fresh access token, refreshing the credentials in place
+        Returns:
+            tuple of the access token and its expiry as a time.time() timestamp
+        """
+        import httplib2
+
+        self.credentials.refresh(httplib2.Http())
+        expiry = self.credentials.token_expiry  # Naive UTC datetime
+        if expiry is None:
+            return self.credentials.access_token, time.time() + 3600  # Google tokens live an hour
+        return self.credentials.access_token, expiry.replace(tzinfo=timezone.utc).timestamp()
+
+    def manage(self, margin: float = 300) -> CredentialManager:
+        """
+        Method for getting a started CredentialManager that keeps the token valid in the background
+        Arguments:
+            margin: seconds before the expiry to refresh the token
+        Returns:
+            CredentialManager with the client registered, if authenticated
+        """
+        manager = CredentialManager(self.fetch_token, margin=margin)
+        manager.start()
+        if self.client is not None:
+            manager.register(self.client)
+        return manager
+
+
+class CredentialManager:
+    """
+    Object sharing one valid access token across GSpread clients and threads, refreshing it in the background shortly before it expires
+    Attributes:
+        token_source: callable returning a fresh (access token, expiry as a time.time() timestamp) tuple, e.g. Auth.fetch_token
+        margin: seconds before the expiry to refresh the token. Tokens living shorter than twice the margin are refreshed halfway
+        retry: seconds to wait before retrying a failed background refresh. Also the least time between fetches when the token source hands out tokens that have already expired
+        clients: the GSpread clients sending the shared token
+        error: the exception of the last failed refresh, or a ValueError if the token source handed out an expired token. None if the last refresh succeeded
+    Methods:
+        token: Method for getting the current access token, only blocks if it has expired
+        credentials: Method for getting google-auth credentials that send the shared token
+        authorize: Method for getting a GSpread client that sends the shared token
+        register: Method for making an existing GSpread client send the shared token
+        refresh: Method for getting a new token right away
+        start: Method for starting the background refresh thread
+        stop: Method for stopping the background refresh thread
+    Example:
+        import google_auth
+
+        with CredentialManager(google_auth.TokenSource(google_auth.Credentials())) as manager:
+            client = manager.authorize()
+            ...  # Long running work with client, the token is kept valid in the background
+    """
+    def __init__(self, token_source: Callable[[], Tuple[str, float]], margin: float = 300, retry: float = 10):
+        """
+        Initializer method
+        Arguments:
+            token_source: callable returning a fresh (access token, expiry as a time.time() timestamp) tuple
+            margin: seconds before the expiry to refresh the token
+            retry: seconds to wait before retrying a failed background refresh or fetching again after an expired token
+        """
+        self.token_source = token_source
+        self.margin = margin
+        self.retry = retry
+        self.clients = []
+        self.error = None
+
+        self.__current = None  # (token, expiry, issued) tuple, replaced as a whole so readers never need the lock
+        self.__credentials = None
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def token(self) -> str:
+        """
+        Method for getting the current access token. Only blocks on a refresh if the token has actually expired
+        Returns:
+            string, a valid access token
+        """
+        current = self.__current
+        if current is None or time.time() >= current[1]:
+            current = self.__refresh(current)
+        return current[0]
+
+    def credentials(self) -> ManagedCredentials:
+        """
+        Method for getting google-auth credentials that put the shared token on every request
+        Returns:
+            ManagedCredentials object backed by this manager
+        """
+        if self.__credentials is None:
+            from managed_credentials import ManagedCredentials
+            self.__credentials = ManagedCredentials(self)
+        return self.__credentials
+
+    def authorize(self) -> gspread.client.Client:
+        """
+        Method for getting a GSpread client that sends the shared token
+        Returns:
+            GSpread client object with the managed credentials
+        """
+        import gspread
+
+        client = gspread.authorize(self.credentials())
+        with self.__lock:
+            self.clients.append(client)
+        return client
+
+    def register(self, client: gspread.client.Client) -> gspread.client.Client:
+        """
+        Method for making an existing GSpread client send the shared token instead of refreshing its own.
+        Replaces the credentials of the client's AuthorizedSession, which puts its own token on every request
+        Arguments:
+            client: the GSpread client, version 3.2 or newer
+        Returns:
+            The same client, for chaining
+        """
+        credentials = self.credentials()
+        http = getattr(client, 'http_client', client)  # Newer GSpread versions keep the session on an http client
+        http.auth = credentials
+        http.session.credentials = credentials
+        with self.__lock:
+            self.clients.append(client)
+        return client
+
+    def refresh(self) -> str:
+        """
+        Method for getting a new token right away, regardless of the expiry of the current one
+        Returns:
+            string, the new access token
+        """
+        return self.__refresh(self.__current)[0]
+
+    def start(self):
+        """
+        Method for starting the background refresh thread. Gets the first token before returning
+        """
+        self.token()
+        if self.__thread is None or not self.__thread.is_alive():
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__run, name='CredentialManager', daemon=True)
+            self.__thread.start()
+
+    def stop(self):
+        """
+        Method for stopping the background refresh thread
+        """
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __enter__(self) -> CredentialManager:
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __refresh(self, stale: Optional[tuple]) -> tuple:
+        """
+        Private method for replacing a stale token. Only one thread fetches, the others wait for and reuse its token
+        Arguments:
+            stale: the (token, expiry, issued) tuple the caller saw, None if there was no token
+        Returns:
+            The current (token, expiry, issued) tuple
+        """
+        with self.__lock:
+            if self.__current is not stale:
+                return self.__current  # Another thread refreshed while we waited for the lock
+            if stale is not None and stale[1] <= stale[2] and time.time() - stale[2] < self.retry:
+                return stale  # The source hands out expired tokens, don't fetch more than once per retry interval
+            token, expiry = self.token_source()
+            issued = time.time()
+            self.__current = (token, expiry, issued)
+            self.error = ValueError('Token source returned a token expiring at {:.0f}, {:.1f}s before it was fetched'.format(expiry, issued - expiry)) if expiry <= issued else None
+            return self.__current
+
+    def __run(self):
+        """
+        Private method run by the background thread, refreshing the token shortly before every expiry
+        """
+        while not self.__stop.is_set():
+            current = self.__current
+            token, expiry, issued = current
+            if expiry <= issued:
+                refresh_at = issued + self.retry  # Already expired when fetched, e.g. clock skew. Don't spin on the source
+            else:
+                refresh_at = expiry - min(self.margin, (expiry - issued) / 2)
+            if self.__stop.wait(max(0., refresh_at - time.time())):
+                break
+            try:
+                self.__refresh(current)
+            except Exception as e:  # Keep the thread alive, token() refreshes inline if the token expires meanwhile
+                self.error = e
+                self.__stop.wait(self.retry)
+
+
+if __name__ == '__main__':
+    import itertools
+    import gspread
+
+    def test_background_refresh():
+        counter = itertools.count()
+
+        def fake_token_source():
+            time.sleep(0.2)  # Simulate a slow token endpoint
+            return 'token-{}'.format(next(counter)), time.time() + 1
+
+        print('Testing background refresh with tokens expiring after 1s')
+        with CredentialManager(fake_token_source, margin=0.3) as manager:
+            for _ in range(10):
+                t = time.perf_counter()
+                token = manager.token()
+                print('{} fetched in {:.1f}ms'.format(token, (time.perf_counter() - t) * 1000))
+                time.sleep(0.3)
+
+    def test_expired_refresh():
+        counter = itertools.count()
+
+        def fake_token_source():
+            return 'token-{}'.format(next(counter)), time.time() + 0.1
+
+        print('Testing inline refresh of an expired token without the background thread')
+        manager = CredentialManager(fake_token_source)
+        print('Before expiry:', manager.token())
+        time.sleep(0.2)
+        print('After expiry:', manager.token())
+
+    def test_expired_source():
+        counter = itertools.count()
+
+        def fake_token_source():
+            next(counter)
+            return 'token', time.time()  # Expired as soon as it is handed out
+
+        print('Testing a token source handing out expired tokens, expecting 1 fetch per 0.2s retry interval')
+        with CredentialManager(fake_token_source, retry=0.2) as manager:
+            t = time.perf_counter()
+            while time.perf_counter() - t < 0.5:
+                manager.token()
+        print('Fetches in 0.5s:', next(counter))
+        print('Error:', manager.error)
+
+    def test_sent_token():
+        import requests
+        from google.oauth2.credentials import Credentials
+
+        class RecordingAdapter(requests.adapters.BaseAdapter):
+            def __init__(self):
+                super().__init__()
+                self.sent = []
+
+            def send(self, request, **kwargs):
+                self.sent.append(request.headers['Authorization'])
+                response = requests.Response()
+                response.status_code = 200
+                response.request = request
+                return response
+
+            def close(self):
+                pass
+
+        counter = itertools.count()
+
+        def fake_token_source():
+            return 'manager-token-{}'.format(next(counter)), time.time() + 0.5
+
+        print('Testing the token actually sent by GSpread clients')
+        with CredentialManager(fake_token_source, margin=0.2) as manager:
+            own = manager.register(gspread.authorize(Credentials('client-own-token')))
+            managed = manager.authorize()
+            for client in (own, managed):
+                adapter = RecordingAdapter()
+                client.http_client.session.mount('https://', adapter)
+                for _ in range(3):
+                    client.http_client.session.get('https://sheets.googleapis.com/v4/spreadsheets')
+                    time.sleep(0.3)
+                print('Sent:', adapter.sent)
+
+    test_background_refresh()
+    print()
+    test_expired_refresh()
+    print()
+    test_expired_source()
+    print()
+    test_sent_token()
@@ -6,26 +6,7 @@ Automatically generated by Colaboratory.
 Original file is located at
     https://colab.research.google.com/drive/1epYpSEQh06DZdGDoH-Rbysi5T2mTQUj5
 """
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from google.auth.transport.requests import AuthorizedSession
-#from oauth2client.client import GoogleCredentials
-import pandas as pd
-import google.auth
-import gspread
-from urllib.request import urlopen, Request
-import json
-import pandas as pd
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import calendar
-import requests
-from datetime import date
-import concurrent.futures
-import itertools
-import re
-import numpy as np
-import math
-from requests.auth import HTTPBasicAuth
+from compacter import compact_dataframe
 
 """Competition metric - Keyword Difficulty
 
@@ -40,10 +21,14 @@ class KeywordDiffiulty:
         self.sheet = self.connection.worksheet('Keyword Analysis')
         self.start = 4
 
-    def data_from_sheet(self):
+    def data_from_sheet(self, compact=False):
+        from gspread_dataframe import get_as_dataframe
+
         dataframe = get_as_dataframe(self.sheet)
         dataframe.columns = dataframe.iloc[self.start, :].tolist()
         dataframe = dataframe.drop(range(self.start+1))
+        if compact:
+            dataframe = compact_dataframe(dataframe)  # Categoricals and nullable integers instead of objects
         return dataframe
         
     def get_relevant_keywords(self):
@@ -70,6 +55,11 @@ class KeywordDiffiulty:
         return keyword_list_chunks
 
     def api_call(self):
+      import json
+      import pandas as pd
+      import requests
+      from requests.auth import HTTPBasicAuth
+
       keyword_list_chunks = self.divide_chunks()
       location = "Denmark"
       language = "Danish"
@@ -105,6 +95,8 @@ class KeywordDiffiulty:
       return keyword_difficulty_df
 
     def postdata(self):
+        import pandas as pd
+        from gspread_dataframe import set_with_dataframe
 
         keyword_analysis_df = self.data_from_sheet() # gets data again
         keyword_difficulty_df = self.api_call() #returns keyword_difficulty_df
@@ -126,27 +118,27 @@ class KeywordDiffiulty:
           set_with_dataframe(self.sheet, new_df, row=6, include_index=False, include_column_header=True)
 
         try: 
-            gc.insert_permission(
+            self.gc.insert_permission(
             self.connection.id,
             "s360digital.com",
             perm_type='domain',
             role='writer'
             )
         except:
-            gc.insert_permission(
+            self.gc.insert_permission(
             self.connection.id,
             None,
             perm_type='anyone',
             role='reader'
               )
 
-def main():
-    auth.authenticate_user()
-    creds, _ = default()
-    gc = gspread.authorize(creds)
-    test = KeywordDiffiulty('1gkH1gS7Vj0x70PVKMJZhzVLuuMoa3dl2RqzVNmAp3u8', gc)
-    return test.data_from_sheet() # change to return something when deploying to cloud  
-main()
-
+def main(sheet_id='1gkH1gS7Vj0x70PVKMJZhzVLuuMoa3dl2RqzVNmAp3u8', gc=None):
+    if gc is None:
+        import google_auth
+        gc = google_auth.Authenticate()
+    test = KeywordDiffiulty(sheet_id, gc)
+    return test.data_from_sheet() # change to return something when deploying to cloud
 
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+from google.auth import credentials
+
+
+class ManagedCredentials(credentials.Credentials):
+    """
+    Google-auth credentials object backed by a googler.CredentialManager, so every session using it sends the shared token
+    Attributes:
+        manager: the CredentialManager holding the token
+    Methods:
+        before_request: Method for putting the current shared token on a request, only blocks if the token has expired
+        refresh: Method for getting a new shared token, used by AuthorizedSession when a request is rejected
+    """
+    def __init__(self, manager):
+        """
+        Initializer method
+        Arguments:
+            manager: the googler.CredentialManager holding the token
+        """
+        super().__init__()
+        self.manager = manager
+
+    def before_request(self, request, method: str, url: str, headers: dict):
+        """
+        Method for putting the current shared token on a request
+        Arguments:
+            request: the google-auth transport request, unused as the manager refreshes the token
+            method: the HTTP method of the request
+            url: the url of the request
+            headers: the headers of the request
+        """
+        self.token = self.manager.token()
+        self.apply(headers)
+
+    def refresh(self, request):
+        """
+        Method for getting a new shared token, used by AuthorizedSession when a request is rejected with the current one
+        Arguments:
+            request: the google-auth transport request, unused as the manager refreshes the token
+        """
+        self.token = self.manager.refresh()
@@ -1,7 +1,10 @@
-import gspread
-from gspread_dataframe import set_with_dataframe
-import pandas as pd
-from typing import Union, List
+from __future__ import annotations
+from typing import Union, List, TYPE_CHECKING
+from compacter import compact_dataframe
+
+if TYPE_CHECKING:
+    import gspread
+    import pandas as pd
 
 
 class SpreadSheetHandler:
@@ -24,17 +27,23 @@ class SpreadSheetHandler:
         """
         self.sheets = auth.open_by_url(sheet_link)  # Grab the sheets from the link
 
-    def grab_sheet(self, sheet_name: str) -> Union[pd.DataFrame, None]:
+    def grab_sheet(self, sheet_name: str, compact: bool = False) -> Union[pd.DataFrame, None]:
         """
         Method for grabbing the data from a given sheet as a pandas DataFrame
         Arguments:
             sheet_name: string, the name of the sheet ot grab
+            compact: boolean, converts the columns to categoricals and nullable integers if True
         Returns:
             The sheet with the given name, None if the name does not exist
         """
+        import gspread
+        import pandas as pd
+
         try:
             sheet = self.sheets.worksheet(sheet_name)  # Grab the specified sheet
             sheet_df = pd.DataFrame(sheet.get_all_records())  # Format to pandas DataFrame
+            if compact:
+                sheet_df = compact_dataframe(sheet_df)  # Shrink the loosely typed columns
             return sheet_df
         except gspread.WorksheetNotFound:
             return None
@@ -46,6 +55,9 @@ class SpreadSheetHandler:
             sheet_name: string, the name to save the sheet as
             data: The pandas DataFrame to save
         """
+        import gspread
+        from gspread_dataframe import set_with_dataframe
+
         try:
             sheet = self.sheets.worksheet(sheet_name)  # Grab the sheet
             sheet.clear()  # Clear the worksheet if it exists
@@ -1,6 +1,5 @@
 import time
 from functools import wraps
-import numpy as np
 import cProfile
 import pstats
 from typing import Union
@@ -67,6 +66,8 @@ class ProgressBar:
         self.__time = time.perf_counter()
 
     def __update_time(self):
+        import numpy as np
+
         self.start()
         self.__time_record.append((self.__progress, self.__time))
         if len(self.__time_record) > np.sqrt(self.resolution):
@@ -83,6 +84,8 @@ class ProgressBar:
         self.__time_record = [(0, time.perf_counter())]
 
     def remaining_time(self) -> float:
+        import numpy as np
+
         x, y = list(zip(*self.__time_record))
         means = (np.mean(x), np.mean(y))
         diff_sqs = ([a - means[0] for a in x], [a - means[1] for a in y])
@@ -93,6 +96,8 @@ class ProgressBar:
             return np.nan
 
     def __str__(self) -> str:
+        import numpy as np
+
         empty_space = int((self.resolution - self.__progress) / self.resolution * self.length)
         try:
             remaining_time = time.strftime('%H:%M:%S', time.gmtime(self.remaining_time()))
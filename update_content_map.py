@@ -1,31 +1,11 @@
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from gspread_formatting import *
-from google.auth.transport.requests import AuthorizedSession
-#from oauth2client.client import GoogleCredentials
-import pandas as pd
-import google.auth
-import gspread
-from urllib.request import urlopen, Request
-import json
-import numpy as np
-import pandas as pd
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import calendar
-import concurrent.futures
 import re
-from google.colab import auth, output
-from oauth2client.client import GoogleCredentials
-from google.auth import default
 
 # Get basics class from SEO github
 import basics
-auth.authenticate_user()
-creds, _ = default()
-gc = gspread.authorize(creds)
+from compacter import compact_dataframe, memory_report
 
 class UpdateScript:
-    def __init__(self, sheet_id, gc):
+    def __init__(self, sheet_id, gc, compact=False):
       self.sheet_id = sheet_id
       self.gc = gc
       self.connection = self.gc.open_by_url("https://docs.google.com/spreadsheets/d/"+str(self.sheet_id))
@@ -34,19 +14,24 @@ class UpdateScript:
       self.content_plan_sheet = self.connection.worksheet('Content plan')
       self.content_gap_sheet = self.connection.worksheet('Content Gap')
       self.start = 4
+      self.compact = compact # Load the sheets as categoricals and nullable integers
+      self.reported = False
     
     def getDataframes (self):
       """
       Getting dataframes for later use 
       """
-      getDataKeyword = basics.Basics(self.sheet_id, self.keyword_analysis_sheet.title, self.start)
-      getDataContentMap = basics.Basics(self.sheet_id, self.content_map_sheet.title, self.start)
-      getDataContentPlan = basics.Basics(self.sheet_id, self.content_plan_sheet.title, self.start)
-      getDataContetGap = basics.Basics(self.sheet_id, self.content_gap_sheet.title, self.start)
-      keyword_analysisDF = getDataKeyword.data_from_sheet()
-      contentMap_df = getDataContentMap.data_from_sheet()
-      contentPlan_df = getDataContentPlan.data_from_sheet()
-      contentGap_df = getDataContetGap.data_from_sheet()
+      getDataKeyword = basics.Basics(self.sheet_id, self.keyword_analysis_sheet.title, self.start, self.gc)
+      getDataContentMap = basics.Basics(self.sheet_id, self.content_map_sheet.title, self.start, self.gc)
+      getDataContentPlan = basics.Basics(self.sheet_id, self.content_plan_sheet.title, self.start, self.gc)
+      getDataContetGap = basics.Basics(self.sheet_id, self.content_gap_sheet.title, self.start, self.gc)
+      keyword_analysisDF = getDataKeyword.data_from_sheet(self.compact)
+      contentMap_df = getDataContentMap.data_from_sheet(self.compact)
+      contentPlan_df = getDataContentPlan.data_from_sheet(self.compact)
+      contentGap_df = getDataContetGap.data_from_sheet(self.compact)
+      if self.compact and not self.reported: # The sheets are loaded again by every step, only report the first load
+          print(memory_report(keyword_analysisDF, contentMap_df, contentPlan_df, contentGap_df))
+          self.reported = True
       return keyword_analysisDF, contentMap_df, contentPlan_df, contentGap_df
 
     def get_client_protocol(self):
@@ -85,10 +70,12 @@ class UpdateScript:
       updated_kw_analysis['Traffic Potential'] = (avg_pos1_ctr * updated_kw_analysis['Volume'].astype(float)) - updated_kw_analysis['Traffic'].astype(float).astype(int)
       updated_kw_analysis['Position'] = 99
       updated_kw_analysis['Current URL'] = ''
-      updated_kw_analysis['Mapped URL'] = updated_kw_analysis['URL'].replace('https?:\/\/.*\.\w{1,3}\/', 'New URL: '+client_prot, regex=True)
+      updated_kw_analysis['Mapped URL'] = updated_kw_analysis['URL'].astype(object).replace('https?:\/\/.*\.\w{1,3}\/', 'New URL: '+client_prot, regex=True)
       updated_kw_analysis = updated_kw_analysis[['Keyword',	'Priority',	'Volume',	'Traffic', 'Traffic Potential',	'Position',	'Current URL', 'Mapped URL']]
       keyword_analysisDF = keyword_analysisDF.append(updated_kw_analysis) # Insert info from Content Gap into the Keyword Analysis
       keyword_analysisDF = keyword_analysisDF.drop_duplicates(subset=['Keyword'], keep='last')
+      if self.compact:
+          keyword_analysisDF = compact_dataframe(keyword_analysisDF) # Appending mixes the compact types with objects again
       return keyword_analysisDF
 
     def create_content_map(self):
@@ -99,40 +86,51 @@ class UpdateScript:
       Return:
       Returns a DF that is used for merging with the curremt Content Map
       """ 
+      import numpy as np
+
       keyword_analysisDF = self.content_gap_transfer()
       col = 'Mapped URL'
 
-      keyword_analysisDF['Volume'] = keyword_analysisDF['Volume'].astype(int)
-      keyword_analysisDF['Position'] = keyword_analysisDF['Position'].astype(float).astype(int)
+      if not self.compact:                                                          # Compact frames are already nullable integers
+          keyword_analysisDF['Volume'] = keyword_analysisDF['Volume'].astype(int)
+          keyword_analysisDF['Position'] = keyword_analysisDF['Position'].astype(float).astype(int)
+      else:
+          keyword_analysisDF['Volume'] = keyword_analysisDF['Volume'].fillna(0)    # An empty Volume would blank the Total Volume of its whole URL
 
       keyword_analysisDF.sort_values([col, 'Order','Volume'], ascending=[False, True, False], inplace=True)
 
-      group = keyword_analysisDF.groupby(col)["Keyword"].apply(list).reset_index()                # Creating group based on Keywords to create Priority Columns & All Keywords column
+      group = keyword_analysisDF.groupby(col, observed=True)["Keyword"].apply(list).reset_index()                # Creating group based on Keywords to create Priority Columns & All Keywords column
       group['Primary Keyword'] = group['Keyword'].str[0]
       group['Secondary Keyword'] = group['Keyword'].str[1]
       group['Tertiary Keyword'] = group['Keyword'].str[2]
       group['All Keywords'] =[', '.join(map(str, l)) for l in group['Keyword']]     # Remove list function to create comma seperated strings
 
-      groupvolume = keyword_analysisDF.groupby(col)["Volume"].apply(list).reset_index()           # Creating group based on Volume to create Priority Columns & Total Volume column
+      groupvolume = keyword_analysisDF.groupby(col, observed=True)["Volume"].apply(list).reset_index()           # Creating group based on Volume to create Priority Columns & Total Volume column
       groupvolume['Primary Keyword Volume'] = groupvolume['Volume'].str[0]
       groupvolume['Secondary Keyword Volume'] = groupvolume['Volume'].str[1]
       groupvolume['Tertiary Keyword Volume'] = groupvolume['Volume'].str[2]
       groupvolume['Total Volume'] = [sum(i) for i in groupvolume['Volume']]         # Creating Total Volume based on sum of Volume Column
 
-      grouprank = keyword_analysisDF.groupby(col)["Position"].apply(list).reset_index()           # Creating group based on Position  to create Priority Columns
+      grouprank = keyword_analysisDF.groupby(col, observed=True)["Position"].apply(list).reset_index()           # Creating group based on Position  to create Priority Columns
       grouprank['Primary Keyword Rank'] = grouprank['Position'].str[0]
       grouprank['Secondary Keyword Rank'] = grouprank['Position'].str[1]
       grouprank['Tertiary Keyword Rank'] = grouprank['Position'].str[2]
 
       traffic = keyword_analysisDF[[col, 'Traffic']]
-      traffic['Traffic'] = traffic['Traffic'].replace(np.nan, 0)
-      traffic['Traffic'] = traffic['Traffic'].astype(float)
-      traffic = traffic.groupby(col).sum()
+      if self.compact:
+          traffic = traffic.fillna({'Traffic': 0})
+      else:
+          traffic['Traffic'] = traffic['Traffic'].replace(np.nan, 0)
+          traffic['Traffic'] = traffic['Traffic'].astype(float)
+      traffic = traffic.groupby(col, observed=True).sum()
       
       potential_traffic = keyword_analysisDF[[col, 'Traffic Potential']]
-      potential_traffic['Traffic Potential'] = potential_traffic['Traffic Potential'].replace(np.nan, 0)
-      potential_traffic['Traffic Potential'] = potential_traffic['Traffic Potential'].astype(float)
-      potential_traffic = potential_traffic.groupby(col).sum()
+      if self.compact:
+          potential_traffic = potential_traffic.fillna({'Traffic Potential': 0})
+      else:
+          potential_traffic['Traffic Potential'] = potential_traffic['Traffic Potential'].replace(np.nan, 0)
+          potential_traffic['Traffic Potential'] = potential_traffic['Traffic Potential'].astype(float)
+      potential_traffic = potential_traffic.groupby(col, observed=True).sum()
 
       temp_df = group.merge(groupvolume, on = col)                                  # Mergin the group dataframes together to one
       temp_df = temp_df.merge(grouprank, on = col) 
@@ -175,6 +173,8 @@ class UpdateScript:
       Return:
           Returns nothing, but updates the Google Sheets added
       """
+      from gspread_dataframe import set_with_dataframe
+
       content_map_df = self.getNewURLs() # post this 
       keyword_analysis_df = self.content_gap_transfer() # post this 
       self.content_map_sheet.clear()
@@ -184,6 +184,15 @@ class UpdateScript:
       set_with_dataframe(self.content_map_sheet, content_map_df, row=6, include_index=False, include_column_header=True) # set content map
 
       return 
-test = UpdateScript('18ItgOhKo5FoZCjXmsaUtpHphjQHhNMHGCBGdEpK-Bdk', gc)
-new_contentM = test.getNewURLs()
-test.update_googlesheet()
+
+def main(sheet_id='18ItgOhKo5FoZCjXmsaUtpHphjQHhNMHGCBGdEpK-Bdk', gc=None, compact=False):
+    if gc is None:
+        import google_auth
+        gc = google_auth.Authenticate()
+    test = UpdateScript(sheet_id, gc, compact)
+    test.update_googlesheet()
+
+
+if __name__ == '__main__':
+    main()
+
@@ -1,5 +1,8 @@
-import requests
-from typing import Tuple, Union
+from __future__ import annotations
+from typing import Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
 
 
 class ZenSerp:
@@ -20,6 +23,8 @@ class ZenSerp:
         Arguments:
             api_key: string, a valid api key from ZenSerp
         """
+        import requests
+
         self.api_key = api_key
         self.session = requests.session()
 
@@ -51,6 +56,8 @@ class ZenSerp:
         return self.__generic_check(response).json()
 
     def __generic_check(self, response: requests.Response) -> requests.Response:
+        import requests
+
         if response.ok:
             return response
         if self.get_status()['remaining_requests'] <= 0: